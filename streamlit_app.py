@@ -1,122 +1,457 @@
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+import httpx
+from lxml import etree
+from wordcloud import STOPWORDS, WordCloud
+from matplotlib.figure import Figure
+import asyncio
+import codecs
+import io
 import re
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from urllib.parse import urlsplit, urlunsplit
 import openai  # Optional: Only needed if you use GPT-based suggestions
 
+try:
+    # Optional: Only needed for faster keyword counting on very large pages
+    import numpy as np
+    from numba import njit, types
+    from numba.typed import Dict
+except ImportError:
+    njit = None
+
 # =========================
 # CONFIGURE YOUR OPENAI KEY
 # =========================
 # If you want the AI "SEO Genie" to work, uncomment and set your key:
 # openai.api_key = "YOUR-OPENAI-API-KEY"
 
-def fetch_html(url):
+# Only the first 512KB of a page is downloaded and analyzed
+MAX_HTML_BYTES = 512 * 1024
+# Fetched pages are reused for an hour, up to this many URLs
+PAGE_CACHE_TTL = 3600
+PAGE_CACHE_SIZE = 128
+# Without a charset in the Content-Type header, look for <meta charset> this far in
+CHARSET_SNIFF_BYTES = 4096
+# Matches both <meta charset="..."> and <meta http-equiv=... content="...; charset=...">
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+HEADER_TAGS = ('h1', 'h2', 'h3', 'h4')
+# Text inside these tags is not visible page text (BeautifulSoup's string containers)
+HIDDEN_TEXT_TAGS = frozenset({'script', 'style', 'template', 'rt', 'rp'})
+# Keyword tokens are matched against already-lowercased text
+WORD_RE = re.compile(r'\b[a-z]{3,}\b')
+WORD_BYTES_RE = re.compile(rb'[A-Za-z]+')
+NON_ASCII_WORD_RE = re.compile(r'[^\W\x00-\x7f]')
+# Same stopword list the word cloud uses, so both views agree
+STOP_WORDS = frozenset(STOPWORDS)
+MAX_CLOUD_WORDS = 50
+# SEO score lookup tables, indexed by bisect over the length bucket edges
+TITLE_EDGES = (0, 30, 50, 61, 71)
+TITLE_POINTS = (5, 10, 20, 10, 5)
+DESC_EDGES = (0, 80, 120, 161, 201)
+DESC_POINTS = (5, 10, 20, 10, 5)
+# Below this many characters the regex tokenizer beats the JIT call overhead
+JIT_MIN_CHARS = 200_000
+
+@st.cache_resource
+def get_async_http():
+    """
+    Start a background event loop with a shared HTTP/2 client.
+    Both survive Streamlit reruns, so connections are reused across clicks.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    client = httpx.AsyncClient(
+        http2=True,
+        timeout=10,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=16),
+        headers={
+            "User-Agent": "SEO-Genie/1.0",
+            "Accept-Encoding": "gzip, deflate",
+        },
+    )
+    return loop, client
+
+@st.cache_resource
+def get_page_cache():
+    """
+    Successfully fetched pages, shared across reruns: {url: (fetched_at, html)}.
+    """
+    return {}, threading.Lock()
+
+def add_scheme(url):
+    """
+    Make sure the URL starts with http or https; this is the URL that is fetched.
+    """
+    url = url.strip()
+    if urlsplit(url).scheme not in ('http', 'https'):
+        url = "https://" + url
+    return url
+
+def normalize_url(url):
+    """
+    Canonicalize a URL into a cache key, so equivalent inputs share one entry.
+    Only used as a key: pages are fetched from add_scheme(url) as typed.
+    """
+    parts = urlsplit(add_scheme(url))
+    # Only the root is folded: /blog/ and /blog can be different pages
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme, parts.netloc.lower(), path, parts.query, ""))
+
+class OnPageTarget:
+    """
+    lxml parser target that collects on-page SEO elements from parse events,
+    so pages are analyzed as they stream in without building a tree.
+    Visible text follows BeautifulSoup's get_text() rules.
+    """
+
+    def __init__(self):
+        self.title = None
+        self.meta_desc = None
+        self.headers = {h: [] for h in HEADER_TAGS}
+        self.text_parts = []
+        self._hidden = 0         # open tags whose text is not visible (script, style...)
+        self._buffer = []        # raw text since the last event; one text node
+        self._title_parts = None
+        self._header_parts = []  # (tag, slot, parts) for each open h1-h4
+
+    def _flush(self):
+        # lxml may split one text node across several data() calls
+        if not self._buffer:
+            return
+        text = ''.join(self._buffer)
+        self._buffer = []
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+        if self._hidden:
+            return
+        text = text.strip()
+        if text:
+            # For keyword density: the visible text from <p>, <span>, etc.
+            self.text_parts.append(text)
+            for _, _, parts in self._header_parts:
+                parts.append(text)
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden += 1
+        elif tag in self.headers:
+            # Reserve the slot now so headers stay in document order when nested
+            self._header_parts.append((tag, len(self.headers[tag]), []))
+            self.headers[tag].append("")
+        elif tag == 'title' and self.title is None:
+            self._title_parts = []
+        elif tag == 'meta' and self.meta_desc is None and attrib.get('name') == 'description':
+            self.meta_desc = (attrib.get('content') or "").strip()
+
+    def end(self, tag):
+        # lxml reports balanced events, auto-closing tags on a truncated page
+        self._flush()
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden -= 1
+        elif tag in self.headers:
+            name, slot, parts = self._header_parts.pop()
+            self.headers[name][slot] = ''.join(parts)
+        elif tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts).strip()
+            self._title_parts = None
+
+    def data(self, data):
+        self._buffer.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self.title or "", self.meta_desc or "", self.headers, ' '.join(self.text_parts)
+
+def sniff_charset(head):
     """
-    Fetch the HTML content of a given URL.
+    Read the charset from a <meta> tag in the first bytes of a page.
+    Cheap stand-in for statistical charset detection; defaults to UTF-8.
+    """
+    match = META_CHARSET_RE.search(head[:CHARSET_SNIFF_BYTES])
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+def make_decoder(encoding):
+    """
+    Build an incremental decoder, falling back to UTF-8 for unknown charsets.
     """
     try:
-        # Make sure the URL starts with http or https
-        if not url.startswith("http"):
-            url = "https://" + url
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            return response.text
-        else:
-            st.warning("Could not retrieve the page. Check URL or status code.")
+        factory = codecs.getincrementaldecoder(encoding)
+    except LookupError:
+        factory = codecs.getincrementaldecoder('utf-8')
+    return factory(errors='ignore')
+
+def make_onpage_parser():
+    """
+    Build an lxml HTML parser that feeds an OnPageTarget.
+    """
+    return etree.HTMLParser(target=OnPageTarget(), recover=True)
+
+async def fetch_onpage_data(client, url):
+    """
+    Fetch a given URL and extract its on-page SEO elements
+    while the body is still downloading.
+    Returns (title, meta description, headers, visible text), or None for an empty page.
+    Raises httpx.HTTPStatusError on a non-2xx status.
+    """
+    async with client.stream("GET", url) as response:
+        if not response.is_success:
+            raise httpx.HTTPStatusError(
+                f"HTTP {response.status_code}", request=response.request, response=response
+            )
+        decoder = None
+        parser = make_onpage_parser()
+        # Title, meta and headings live near the top; don't download huge pages in full
+        total = 0
+        async for chunk in response.aiter_bytes(chunk_size=65536):
+            if decoder is None:
+                decoder = make_decoder(response.charset_encoding or sniff_charset(chunk))
+            text = decoder.decode(chunk)
+            if text:
+                parser.feed(text)
+            total += len(chunk)
+            if total >= MAX_HTML_BYTES:
+                break
+        if not total:
             return None
-    except Exception as e:
-        st.error(f"Error fetching the URL: {e}")
-        return None
+        text = decoder.decode(b'', final=True)
+        if text:
+            parser.feed(text)
+        return parser.close()
 
-def extract_onpage_data(html):
+async def fetch_many(client, urls):
     """
-    Extract relevant on-page SEO elements from the HTML.
+    Fetch all URLs at once over the shared client; errors are returned, not raised.
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    title_tag = soup.find('title').text.strip() if soup.find('title') else ""
-    meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
-    meta_desc = meta_desc_tag['content'].strip() if meta_desc_tag and meta_desc_tag.get('content') else ""
-    
-    # Collect h1, h2, h3...
-    headers = {}
-    for h in ['h1', 'h2', 'h3', 'h4']:
-        headers[h] = [tag.get_text(strip=True) for tag in soup.find_all(h)]
-    
-    # For keyword density: parse the visible text from <p>, <span>, etc.
-    texts = soup.get_text(separator=' ', strip=True)
-    
-    return title_tag, meta_desc, headers, texts
+    return await asyncio.gather(*(fetch_onpage_data(client, url) for url in urls), return_exceptions=True)
+
+def fetch_all(urls):
+    """
+    Fetch and analyze several URLs concurrently.
+    Returns a (data, error) pair for each URL, in the same order as `urls`;
+    data is None when the fetch failed or the page was empty.
+    """
+    # A malformed URL (urlsplit raises ValueError) fails on its own, like a fetch error
+    keys = []
+    url_errors = []
+    for url in urls:
+        try:
+            keys.append(normalize_url(url))
+            url_errors.append(None)
+        except ValueError as e:
+            keys.append(None)
+            url_errors.append(e)
+    cache, lock = get_page_cache()
+    now = time.monotonic()
+    with lock:
+        results = {
+            key: cache[key][1] for key in keys
+            if key is not None and key in cache and now - cache[key][0] < PAGE_CACHE_TTL
+        }
+
+    # First URL typed for each uncached key
+    missing = {}
+    for key, url in zip(keys, urls):
+        if key is not None and key not in results:
+            missing.setdefault(key, add_scheme(url))
+    if missing:
+        loop, client = get_async_http()
+        fetched = asyncio.run_coroutine_threadsafe(fetch_many(client, list(missing.values())), loop).result()
+        results.update(zip(missing, fetched))
+        # Only successes are cached, so a transient failure can be retried
+        with lock:
+            for key, data in zip(missing, fetched):
+                if isinstance(data, tuple):
+                    cache[key] = (now, data)
+                    while len(cache) > PAGE_CACHE_SIZE:
+                        cache.pop(next(iter(cache)))
+
+    # Each page is (on-page data, None) or (None, error), rendered by the caller
+    pages = []
+    for key, url_error in zip(keys, url_errors):
+        result = url_error if url_error is not None else results[key]
+        if isinstance(result, Exception):
+            pages.append((None, result))
+        else:
+            pages.append((result, None))
+    return pages
+
+def show_fetch_error(error):
+    """
+    Report why a page could not be fetched.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        st.warning("Could not retrieve the page. Check URL or status code.")
+    else:
+        st.error(f"Error fetching the URL: {error}")
 
 def calculate_seo_score(title, meta_desc, headers):
     """
     Very rough, example-based scoring function for demonstration purposes.
     """
-    score = 0
+    # Length buckets: points for lengths in [EDGES[i], EDGES[i + 1])
     # Title length: ideal ~ 50-60
-    if 50 <= len(title) <= 60:
-        score += 20
-    elif 30 <= len(title) < 50 or 60 < len(title) <= 70:
-        score += 10
-    else:
-        score += 5
-    
+    score = TITLE_POINTS[bisect_right(TITLE_EDGES, len(title)) - 1]
     # Description length: ideal ~ 120-160
-    if 120 <= len(meta_desc) <= 160:
-        score += 20
-    elif 80 <= len(meta_desc) < 120 or 160 < len(meta_desc) <= 200:
-        score += 10
-    else:
-        score += 5
+    score += DESC_POINTS[bisect_right(DESC_EDGES, len(meta_desc)) - 1]
     
     # Presence of H1
-    if len(headers['h1']) > 0:
-        score += 20
-    else:
-        score += 0
+    score += 20 * bool(headers['h1'])
     
     # Some weighting for h2, h3 usage
-    h2_count = len(headers['h2'])
-    h3_count = len(headers['h3'])
     # This is arbitrary, just for a basic demonstration
-    if h2_count >= 1:
-        score += 10
-    if h3_count >= 2:
-        score += 10
+    score += 10 * (len(headers['h2']) >= 1)
+    score += 10 * (len(headers['h3']) >= 2)
     
     # Minimum score is 0, maximum is 60 in this example
     return min(score, 60)
 
-def generate_wordcloud(text):
+@st.cache_resource
+def get_wordcloud():
+    """
+    Build the configured WordCloud once and reuse it across reruns.
+    Returns it with a lock, since the instance is shared by every session;
+    the lock also guards the shared figure from get_wordcloud_figure.
+    """
+    wordcloud = WordCloud(width=800, height=400, background_color='white', max_words=MAX_CLOUD_WORDS)
+    return wordcloud, threading.Lock()
+
+@st.cache_resource
+def get_wordcloud_figure():
     """
-    Generate and display a word cloud from the given text.
+    Build the figure every word cloud is drawn on, once.
+    A plain Figure stays out of pyplot's global registry, so it never leaks.
     """
-    wordcloud = WordCloud(width=800, height=400, background_color='white', max_words=50).generate(text)
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
+    fig = Figure(figsize=(10, 5))
+    ax = fig.add_subplot()
     ax.axis("off")
-    st.pyplot(fig)
+    return fig, ax
 
-def get_top_keywords(text, top_n=10):
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_wordcloud(freq_items):
     """
-    Very simplistic approach to get top words.
+    Render a word cloud for (word, count) pairs to PNG bytes.
     """
-    # Remove non-alpha characters, convert to lowercase
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-    freq = {}
-    for w in words:
-        freq[w] = freq.get(w, 0) + 1
-    
-    # Sort by frequency
-    sorted_freq = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-    
-    return sorted_freq[:top_n]
+    wordcloud, lock = get_wordcloud()
+    fig, ax = get_wordcloud_figure()
+    buf = io.BytesIO()
+    with lock:
+        image = wordcloud.generate_from_frequencies(dict(freq_items)).to_array()
+        # Clouds are always the same size, so swap the pixels into the existing image
+        if ax.images:
+            ax.images[0].set_data(image)
+        else:
+            ax.imshow(image, interpolation='bilinear')
+        fig.savefig(buf, format='png', bbox_inches='tight')
+    return buf.getvalue()
 
-def call_seo_genie(page_title, meta_desc):
+def generate_wordcloud_from_freq(freq):
     """
-    Call an AI model to generate an SEO recommendation in a whimsical style.
+    Generate and display a word cloud from precomputed word frequencies.
+    """
+    if not freq:
+        st.write("Not enough text on the page to build a word cloud.")
+        return
+    # The cloud only draws the top words, so they alone make a complete cache key
+    st.image(render_wordcloud(tuple(freq.most_common(MAX_CLOUD_WORDS))))
+
+if njit is not None:
+    FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+    FNV_PRIME = np.uint64(0x100000001b3)
+
+    @njit(cache=True)
+    def _is_word_byte(b):
+        # ASCII \w: letters, digits and underscore
+        return 97 <= (b | 0x20) <= 122 or 48 <= b <= 57 or b == 95
+
+    @njit(cache=True)
+    def _count_words_kernel(buf):
+        """
+        Count words matching \\b[A-Za-z]{3,}\\b in an ASCII byte buffer,
+        case-insensitively: maximal runs of word bytes made only of letters.
+        Words are keyed by the 64-bit FNV-1a hash of their lowercased bytes; returns
+        parallel arrays of each unique word's first offset and its count, in
+        first-seen order.
+        """
+        counts = Dict.empty(key_type=types.uint64, value_type=types.int64)
+        first = Dict.empty(key_type=types.uint64, value_type=types.int64)
+        n = buf.shape[0]
+        i = 0
+        while i < n:
+            if not _is_word_byte(buf[i]):
+                i += 1
+                continue
+            start = i
+            h = FNV_OFFSET
+            letters_only = True
+            while i < n and _is_word_byte(buf[i]):
+                # Setting bit 0x20 lowercases A-Z and maps every other byte
+                # outside a-z, so one range check both classifies and lowercases
+                c = buf[i] | 0x20
+                if 97 <= c <= 122:
+                    h = (h ^ np.uint64(c)) * FNV_PRIME
+                else:
+                    # A digit or underscore touches the letters: no \b, no word
+                    letters_only = False
+                i += 1
+            if letters_only and i - start >= 3:
+                if h in counts:
+                    counts[h] += 1
+                else:
+                    counts[h] = 1
+                    first[h] = start
+        starts = np.empty(len(counts), dtype=np.int64)
+        totals = np.empty(len(counts), dtype=np.int64)
+        for j, h in enumerate(counts):
+            starts[j] = first[h]
+            totals[j] = counts[h]
+        return starts, totals
+
+def _count_words_jit(text):
+    """
+    Numba-backed equivalent of the regex tokenizer in count_words.
+    """
+    if not text.isascii():
+        # Lowercase like the regex path (it can change what is a word character),
+        # then turn non-ASCII word characters into '0' so they glue to adjacent
+        # letters and void the word, as they do for \b; other non-ASCII becomes '?'
+        text = NON_ASCII_WORD_RE.sub('0', text.lower())
+    # The kernel lowercases ASCII as it scans, so pure-ASCII text is not copied
+    data = text.encode('ascii', 'replace')
+    starts, totals = _count_words_kernel(np.frombuffer(data, dtype=np.uint8))
+    # Only decode each unique word once, from its first occurrence
+    freq = Counter()
+    for start, n in zip(starts.tolist(), totals.tolist()):
+        word = WORD_BYTES_RE.match(data, start).group().decode('ascii').lower()
+        if word not in STOP_WORDS:
+            freq[word] = n
+    return freq
+
+def count_words(text):
+    """
+    Count keyword frequencies in the text, ignoring stopwords.
+    The Counter feeds both the word cloud and the top keywords (most_common).
+    """
+    if njit is not None and len(text) >= JIT_MIN_CHARS:
+        return _count_words_jit(text)
+    # Lowercase once, drop stopwords before counting
+    return Counter(w for w in WORD_RE.findall(text.lower()) if w not in STOP_WORDS)
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def ask_seo_genie(page_title, meta_desc):
+    """
+    Ask the AI model for SEO suggestions, cached per (title, description).
+    Errors propagate so that fallback advice is never cached.
     """
     # Example prompt if using GPT
     prompt = f"""
@@ -126,14 +461,20 @@ def call_seo_genie(page_title, meta_desc):
     Give them 2-3 punchy suggestions to improve their SEO, in a friendly, genie-like tone.
     """
     
+    completion = openai.Completion.create(
+        engine="text-davinci-003",
+        prompt=prompt,
+        max_tokens=100,
+        temperature=0.7
+    )
+    return completion.choices[0].text.strip()
+
+def call_seo_genie(page_title, meta_desc):
+    """
+    Call an AI model to generate an SEO recommendation in a whimsical style.
+    """
     try:
-        completion = openai.Completion.create(
-            engine="text-davinci-003",
-            prompt=prompt,
-            max_tokens=100,
-            temperature=0.7
-        )
-        return completion.choices[0].text.strip()
+        return ask_seo_genie(page_title, meta_desc)
     except Exception as e:
         st.warning("OpenAI API error or missing API key. Showing static advice instead.")
         return ("1. Ensure your title is eye-catching and includes your main keyword.\n"
@@ -156,11 +497,19 @@ def main():
         url2 = st.text_input("Enter Competitor Website URL (optional)", "competitor.com")
     
     if st.button("Analyze"):
+        # Fetch and parse both sites in parallel, then render on the main thread
+        urls = list(dict.fromkeys(url for url in (url1, url2) if url))
+        pages = dict(zip(urls, fetch_all(urls)))
+        page1, error1 = pages.get(url1, (None, None))
+        page2, error2 = pages.get(url2, (None, None))
+        score1 = score2 = None
+
         if url1:
             st.subheader("Your Site Analysis")
-            html1 = fetch_html(url1)
-            if html1:
-                title1, desc1, headers1, texts1 = extract_onpage_data(html1)
+            if error1 is not None:
+                show_fetch_error(error1)
+            elif page1:
+                title1, desc1, headers1, texts1 = page1
                 score1 = calculate_seo_score(title1, desc1, headers1)
                 
                 st.markdown(f"**Title:** {title1}")
@@ -174,8 +523,10 @@ def main():
                 
                 # WordCloud & top keywords
                 st.markdown("### Keyword Density")
-                generate_wordcloud(texts1)
-                top_keywords_1 = get_top_keywords(texts1, top_n=10)
+                # Tokenize once; the cloud and the top keywords share the counts
+                freq1 = count_words(texts1)
+                generate_wordcloud_from_freq(freq1)
+                top_keywords_1 = freq1.most_common(10)
                 st.write("Top Keywords (approx.):", top_keywords_1)
                 
                 # SEO Genie suggestions
@@ -185,9 +536,10 @@ def main():
                 
         if url2:
             st.subheader("Competitor Site Analysis")
-            html2 = fetch_html(url2)
-            if html2:
-                title2, desc2, headers2, texts2 = extract_onpage_data(html2)
+            if error2 is not None:
+                show_fetch_error(error2)
+            elif page2:
+                title2, desc2, headers2, texts2 = page2
                 score2 = calculate_seo_score(title2, desc2, headers2)
                 
                 st.markdown(f"**Title:** {title2}")
@@ -200,8 +552,10 @@ def main():
                 
                 # WordCloud & top keywords for competitor
                 st.markdown("### Keyword Density")
-                generate_wordcloud(texts2)
-                top_keywords_2 = get_top_keywords(texts2, top_n=10)
+                # Tokenize once; the cloud and the top keywords share the counts
+                freq2 = count_words(texts2)
+                generate_wordcloud_from_freq(freq2)
+                top_keywords_2 = freq2.most_common(10)
                 st.write("Top Keywords (approx.):", top_keywords_2)
                 
                 # SEO Genie suggestions for competitor
@@ -210,7 +564,7 @@ def main():
                 st.info(suggestions2)
                 
         # Overall comparison
-        if url1 and url2:
+        if score1 is not None and score2 is not None:
             st.title("🎉 Comparison Summary")
             diff_score = (score1 - score2)
             if diff_score > 0: